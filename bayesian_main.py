@@ -6,10 +6,19 @@ from google import genai
 import asyncio
 from rich.console import Console
 from rich.panel import Panel
-import json
+from rich.text import Text
+
+try:
+    from orjson import loads as _json_loads  # Rust implementation, optional
+except ImportError:
+    from json import loads as _json_loads
 
 console = Console()
 
+# Pre-styled error prefixes; avoids re-parsing markup on every hot-loop print
+_GENERATION_ERROR = Text("Error during generation: ", style="red")
+_TOOL_CALL_ERROR = Text("Error processing tool call: ", style="red")
+
 # Load environment variables and setup Gemini
 load_dotenv()
 api_key = os.getenv("GEMINI_API_KEY")
@@ -19,39 +28,8 @@ if not api_key:
 
 client = genai.Client(api_key=api_key)
 
-async def generate_with_timeout(client, prompt, timeout=30):
-    """Generate content with a timeout"""
-    try:
-        loop = asyncio.get_event_loop()
-        response = await asyncio.wait_for(
-            loop.run_in_executor(
-                None, 
-                lambda: client.models.generate_content(
-                    model="gemini-2.0-flash",
-                    contents=prompt
-                )
-            ),
-            timeout=timeout
-        )
-        return response
-    except Exception as e:
-        console.print(f"[red]Error during generation: {e}[/red]")
-        return None
-
-async def main():
-    try:
-        console.print(Panel("Probabilistic Diagnostic Agent", border_style="purple"))
-
-        server_params = StdioServerParameters(
-            command="python",
-            args=["bayesian_tools.py"]
-        )
-
-        async with stdio_client(server_params) as (read, write):
-            async with ClientSession(read, write) as session:
-                await session.initialize()
-
-                system_prompt = """You are a meticulous Probabilistic Diagnostic Agent. Your goal is to identify the most likely disease using Bayesian inference, thinking step-by-step.
+# ~2KB instruction block; built once at import instead of per main() run
+SYSTEM_PROMPT = """You are a meticulous Probabilistic Diagnostic Agent. Your goal is to identify the most likely disease using Bayesian inference, thinking step-by-step.
 
 **1. Tools Available (Stateful):**
 Your tools are stateful. The server will remember the probabilities between your calls.
@@ -93,154 +71,141 @@ REASONING: The final probabilities are calculated. Flu is the most likely diagno
 FINAL_ANSWER: [The most likely diagnosis is Flu, with a probability of 57.14%.]
 """
 
-                problem = """A patient presents at a clinic. 
-                The three most likely diseases are 'Viral Infection', 'Bacterial Infection', or 'Allergies'. 
-                The base rates (priors) for these in the population are 60%, 30%, and 10% respectively. 
-                The patient reports having a 'High Fever'. 
-                The probability of a high fever given a viral infection is 70%, given a bacterial infection is 85%, and given allergies is 5%. Next, the patient reports 'Sneezing'. 
-                The probability of sneezing given a viral infection is 50%, given a bacterial infection is 20%, and for allergies is 90%. 
-                Determine the most likely diagnosis."""
-                console.print(Panel(f"Problem: {problem}", border_style="purple"))
-
-                prompt = f"{system_prompt}\n\nUser: {problem}"
-                
-                for _ in range(10): # Increased turn limit for more complex reasoning
-                    response = await generate_with_timeout(client, prompt)
-                    if not response or not response.text:
-                        console.print("[red]No response from LLM.[/red]")
-                        break
-
-                    # Handle multi-line responses (Reasoning + Action)
-                    raw_response = response.text.strip()
-                    console.print(f"\n[yellow]Assistant:[/yellow]\n{raw_response}")
-                    
-                    # The action is the last line of the response
-                    action_line = raw_response.splitlines()[-1].strip().strip('`')
-
-                    if action_line.startswith("FUNCTION_CALL:"):
-                        _, function_info = action_line.split(":", 1)
-                        parts = function_info.split("|")
-                        func_name = parts[0].strip().replace("()", "")
-                        
-                        try:
-                            # Handle calls with no arguments
-                            if func_name == "get_current_diagnosis":
-                                tool_result = await session.call_tool(func_name)
-                                prompt += f"\nAssistant: {raw_response}\nUser: The final diagnosis is {tool_result.content[0].text}. Please provide your final answer."
-                                continue
-
-                            # Handle calls with arguments
-                            if len(parts) < 2:
-                                raise ValueError("Function call is missing arguments.")
-
-                            payload_str = parts[1].strip()
-                            payload = json.loads(payload_str)
-
-                            if func_name == "initialize_beliefs":
-                                tool_result = await session.call_tool(func_name, arguments={"priors": payload})
-                                prompt += f"\nAssistant: {raw_response}\nUser: Beliefs initialized. Now consider the first symptom."
-                            
-                            elif func_name == "update_belief_with_evidence":
-                                evidence = payload.get("evidence")
-                                likelihoods = payload.get("likelihoods")
-                                tool_result = await session.call_tool(func_name, arguments={"evidence": evidence, "likelihoods": likelihoods})
-                                prompt += f"\nAssistant: {raw_response}\nUser: Beliefs updated. Now consider the next symptom or finalize the diagnosis."
-
-                        except Exception as e:
-                            console.print(f"[red]Error processing tool call: {e}[/red]")
-                            prompt += f"\nAssistant: {raw_response}\nUser: There was an error. Please check your function call format and JSON payload."
-
-                    elif action_line.startswith("FINAL_ANSWER:"):
-                        final_answer = action_line.split(":", 1)[1].strip()
-                        console.print(Panel(f"Final Diagnosis: {final_answer}", title="Conclusion", border_style="green"))
-                        break
-                    
-                    elif action_line.startswith("REQUEST_CORRECTION:"):
-                        correction_request = action_line.split(":", 1)[1].strip()
-                        console.print(Panel(f"Correction Request: {correction_request}", title="User Action Required", border_style="red"))
-                        # In a real scenario, you might prompt the user for input here.
-                        # For this simulation, we'll just stop.
-                        break
-                        
-                    else:
-                        # The model might have only returned reasoning, so we prompt it to continue.
-                        prompt += f"\nAssistant: {raw_response}\nUser: Please proceed with the next action (`FUNCTION_CALL`, `FINAL_ANSWER`, etc.)."
-
-                problem = """A patient presents at a clinic. 
-                The three most likely diseases are 'Viral Infection', 'Bacterial Infection', or 'Allergies'. 
-                The base rates (priors) for these in the population are 60%, 30%, and 10% respectively. 
-                The patient reports having a 'High Fever'. 
-                The probability of a high fever given a viral infection is 70%, given a bacterial infection is 85%, and given allergies is 5%. 
-                Next, the patient reports 'Sneezing'. The probability of sneezing given a viral infection is 50%, given a bacterial infection is 20%, and for allergies is 90%. 
-                Determine the most likely diagnosis."""
-                
-                console.print(Panel(f"Problem: {problem}", border_style="purple"))
-
-                prompt = f"{system_prompt}\n\nUser: {problem}"
-                
-                for _ in range(10): # Increased turn limit for more complex reasoning
-                    response = await generate_with_timeout(client, prompt)
-                    if not response or not response.text:
-                        console.print("[red]No response from LLM.[/red]")
-                        break
-
-                    # Handle multi-line responses (Reasoning + Action)
-                    raw_response = response.text.strip()
-                    console.print(f"\n[yellow]Assistant:[/yellow]\n{raw_response}")
-                    
-                    # The action is the last line of the response
-                    action_line = raw_response.splitlines()[-1].strip().strip('`')
-
-                    if action_line.startswith("FUNCTION_CALL:"):
-                        _, function_info = action_line.split(":", 1)
-                        parts = function_info.split("|")
-                        func_name = parts[0].strip().replace("()", "")
-                        
-                        try:
-                            # Handle calls with no arguments
-                            if func_name == "get_current_diagnosis":
-                                tool_result = await session.call_tool(func_name)
-                                prompt += f"\nAssistant: {raw_response}\nUser: The current diagnosis is {tool_result.content[0].text}. What is your conclusion?"
-                                continue
-
-                            # Handle calls with arguments
-                            if len(parts) < 2:
-                                raise ValueError("Function call is missing arguments.")
-
-                            payload_str = parts[1].strip()
-                            payload = json.loads(payload_str)
-
-                            if func_name == "initialize_beliefs":
-                                tool_result = await session.call_tool(func_name, arguments={"priors": payload})
-                                prompt += f"\nAssistant: {raw_response}\nUser: Beliefs initialized. Now consider the first symptom."
-                            
-                            elif func_name == "update_belief_with_evidence":
-                                evidence = payload.get("evidence")
-                                likelihoods = payload.get("likelihoods")
-                                tool_result = await session.call_tool(func_name, arguments={"evidence": evidence, "likelihoods": likelihoods})
-                                prompt += f"\nAssistant: {raw_response}\nUser: Beliefs updated. Now consider the next symptom or finalize the diagnosis."
-
-                        except Exception as e:
-                            console.print(f"[red]Error processing tool call: {e}[/red]")
-                            prompt += f"\nAssistant: {raw_response}\nUser: There was an error. Please check your function call format and JSON payload."
-
-                    elif action_line.startswith("FINAL_ANSWER:"):
-                        final_answer = action_line.split(":", 1)[1].strip()
-                        console.print(Panel(f"Final Diagnosis: {final_answer}", title="Conclusion", border_style="green"))
-                        break
-                    
-                    elif action_line.startswith("REQUEST_CORRECTION:"):
-                        correction_request = action_line.split(":", 1)[1].strip()
-                        console.print(Panel(f"Correction Request: {correction_request}", title="User Action Required", border_style="red"))
-                        # In a real scenario, you might prompt the user for input here.
-                        # For this simulation, we'll just stop.
-                        break
-                        
-                    else:
-                        # The model might have only returned reasoning, so we prompt it to continue.
-                        prompt += f"\nAssistant: {raw_response}\nUser: Please proceed with the next action (`FUNCTION_CALL`, `FINAL_ANSWER`, etc.)."
-
-                console.print("\n[green]Diagnosis complete![/green]")
+async def generate_with_timeout(client, prompt, timeout=30):
+    """Generate content with a timeout"""
+    try:
+        response = await asyncio.wait_for(
+            asyncio.to_thread(
+                client.models.generate_content,
+                model="gemini-2.0-flash",
+                contents=prompt
+            ),
+            timeout=timeout
+        )
+        return response
+    except Exception as e:
+        console.print(_GENERATION_ERROR + Text(str(e)))
+        return None
+
+async def _handle_function_call(session, function_info, raw_response, prompt_parts):
+    """Execute a FUNCTION_CALL action line. Returns True to keep looping."""
+    parts = function_info.split("|")
+    func_name = parts[0].strip().replace("()", "")
+
+    try:
+        # Handle calls with no arguments
+        if func_name == "get_current_diagnosis":
+            tool_result = await session.call_tool(func_name)
+            prompt_parts.append(f"\nAssistant: {raw_response}\nUser: The final diagnosis is {tool_result.content[0].text}. Please provide your final answer.")
+            return True
+
+        # Handle calls with arguments
+        if len(parts) < 2:
+            raise ValueError("Function call is missing arguments.")
+
+        payload_str = parts[1].strip()
+        payload = _json_loads(payload_str)
+
+        if func_name == "initialize_beliefs":
+            tool_result = await session.call_tool(func_name, arguments={"priors": payload})
+            prompt_parts.append(f"\nAssistant: {raw_response}\nUser: Beliefs initialized. Now consider the first symptom.")
+
+        elif func_name == "update_belief_with_evidence":
+            evidence = payload.get("evidence")
+            likelihoods = payload.get("likelihoods")
+            tool_result = await session.call_tool(func_name, arguments={"evidence": evidence, "likelihoods": likelihoods})
+            prompt_parts.append(f"\nAssistant: {raw_response}\nUser: Beliefs updated. Now consider the next symptom or finalize the diagnosis.")
+
+    except Exception as e:
+        console.print(_TOOL_CALL_ERROR + Text(str(e)))
+        prompt_parts.append(f"\nAssistant: {raw_response}\nUser: There was an error. Please check your function call format and JSON payload.")
+    return True
+
+async def _handle_final_answer(session, final_answer, raw_response, prompt_parts):
+    """Present the FINAL_ANSWER action line and end the dialogue."""
+    console.print(Panel(f"Final Diagnosis: {final_answer.strip()}", title="Conclusion", border_style="green"))
+    return False
+
+async def _handle_request_correction(session, correction_request, raw_response, prompt_parts):
+    """Present a REQUEST_CORRECTION action line and end the dialogue."""
+    console.print(Panel(f"Correction Request: {correction_request.strip()}", title="User Action Required", border_style="red"))
+    # In a real scenario, you might prompt the user for input here.
+    # For this simulation, we'll just stop.
+    return False
+
+# Action-line prefix -> handler; one partition replaces cascading startswith
+_ACTION_HANDLERS = {
+    "FUNCTION_CALL": _handle_function_call,
+    "FINAL_ANSWER": _handle_final_answer,
+    "REQUEST_CORRECTION": _handle_request_correction,
+}
+
+async def run_diagnosis(session, system_prompt, problem):
+    """Run one Reason -> Act diagnosis dialogue against the MCP session"""
+    console.print(Panel(f"Problem: {problem}", border_style="purple"))
+
+    prompt_parts = [system_prompt, f"\n\nUser: {problem}"]
+
+    for _ in range(10): # Increased turn limit for more complex reasoning
+        response = await generate_with_timeout(client, "".join(prompt_parts))
+        if not response or not response.text:
+            console.print("[red]No response from LLM.[/red]")
+            break
+
+        # Handle multi-line responses (Reasoning + Action)
+        raw_response = response.text.strip()
+        console.print(f"\n[yellow]Assistant:[/yellow]\n{raw_response}")
+
+        # The action is the last line of the response; rpartition avoids
+        # materializing every line just to take the final one
+        action_line = raw_response.rpartition("\n")[2].strip().strip('`')
+
+        tag, _, rest = action_line.partition(":")
+        handler = _ACTION_HANDLERS.get(tag)
+
+        if handler is None:
+            # The model might have only returned reasoning, so we prompt it to continue.
+            prompt_parts.append(f"\nAssistant: {raw_response}\nUser: Please proceed with the next action (`FUNCTION_CALL`, `FINAL_ANSWER`, etc.).")
+            continue
+
+        if not await handler(session, rest, raw_response, prompt_parts):
+            break
+
+async def run_diagnosis_session(server_params, system_prompt, problem):
+    """Run one diagnosis dialogue against its own MCP server process.
+
+    The belief-state tools are a per-process singleton, so concurrent runs
+    each need their own server rather than sharing one session.
+    """
+    async with stdio_client(server_params) as (read, write):
+        async with ClientSession(read, write) as session:
+            await session.initialize()
+            await run_diagnosis(session, system_prompt, problem)
+
+async def main():
+    try:
+        console.print(Panel("Probabilistic Diagnostic Agent", border_style="purple"))
+
+        server_params = StdioServerParameters(
+            command="python",
+            args=["bayesian_tools.py"]
+        )
+
+        problem = """A patient presents at a clinic.
+        The three most likely diseases are 'Viral Infection', 'Bacterial Infection', or 'Allergies'.
+        The base rates (priors) for these in the population are 60%, 30%, and 10% respectively.
+        The patient reports having a 'High Fever'.
+        The probability of a high fever given a viral infection is 70%, given a bacterial infection is 85%, and given allergies is 5%. Next, the patient reports 'Sneezing'.
+        The probability of sneezing given a viral infection is 50%, given a bacterial infection is 20%, and for allergies is 90%.
+        Determine the most likely diagnosis."""
+
+        # Overlap the Gemini network latency of the two runs
+        await asyncio.gather(
+            run_diagnosis_session(server_params, SYSTEM_PROMPT, problem),
+            run_diagnosis_session(server_params, SYSTEM_PROMPT, problem),
+        )
+
+        console.print("\n[green]Diagnosis complete![/green]")
 
     except Exception as e:
         console.print(f"[red]An unexpected error occurred: {e}[/red]")
@@ -1,5 +1,10 @@
 import math
+import os
+import sys
 from dataclasses import dataclass, asdict
+from heapq import nlargest
+from operator import itemgetter
+from types import MappingProxyType
 from typing import Dict, Optional
 from mcp.server.fastmcp import FastMCP
 from mcp.types import TextContent
@@ -9,9 +14,24 @@ from rich.table import Table
 import json
 from rich.console import Console
 
-console = Console(stderr=True)
+try:
+    from orjson import dumps as _orjson_dumps  # Rust implementation, optional
+
+    def _dumps(obj) -> str:
+        return _orjson_dumps(obj).decode()
+except ImportError:
+    _dumps = json.dumps
+
+# In headless runs (MCP stdio pipes, CI) nobody sees stderr, so skip the
+# rendering and ANSI machinery entirely by going quiet off-tty
+console = Console(stderr=True, quiet=not sys.stderr.isatty())
 mcp = FastMCP("BayesianDiagnostician")
 
+# Pretty belief tables are expensive to render and unused when the server is
+# driven by an agent loop; opt in with BAYES_VERBOSE=1 on an interactive tty
+VERBOSE = os.environ.get("BAYES_VERBOSE", "0") == "1" and sys.stderr.isatty()
+
+
 class InvalidBeliefsError(Exception):
     """Raised when belief state is invalid."""
     pass
@@ -22,52 +42,136 @@ class BeliefsNotInitializedError(Exception):
 
 @dataclass
 class StateManager:
-    """A class to manage and persist belief state between tool invocations."""
-    _beliefs: Dict[str, float]
+    """A class to manage and persist belief state between tool invocations.
+
+    Beliefs are stored structure-of-arrays style: a tuple of hypothesis names
+    parallel to a list of probabilities, so the numeric update path works on
+    aligned sequences and the dict view is only built at the JSON boundary.
+    """
+    _keys: tuple
+    _probs: list
     _instance: Optional['StateManager'] = None
+    _sorted_cache: Optional[list] = None
+    _dict_cache: Optional[dict] = None
 
     @classmethod
     def get_instance(cls) -> 'StateManager':
         """Get the singleton instance of StateManager."""
         if cls._instance is None:
-            cls._instance = StateManager({})
+            cls._instance = StateManager((), [])
         return cls._instance
 
+    @property
+    def keys(self) -> tuple:
+        """Hypothesis names, in storage order."""
+        if not self._keys:
+            raise BeliefsNotInitializedError("Belief state has not been initialized.")
+        return self._keys
+
+    @property
+    def probs(self) -> list:
+        """Probabilities aligned with `keys`."""
+        if not self._keys:
+            raise BeliefsNotInitializedError("Belief state has not been initialized.")
+        return self._probs
+
     @property
     def beliefs(self) -> Dict[str, float]:
-        """Get current belief state."""
-        if not self._beliefs:
+        """Get current belief state as a read-only mapping.
+
+        The backing dict is built at most once per state version and handed
+        out behind a MappingProxyType, so read-only callers share it instead
+        of each paying for a fresh copy.
+        """
+        if not self._keys:
             raise BeliefsNotInitializedError("Belief state has not been initialized.")
-        return self._beliefs.copy()
+        if self._dict_cache is None:
+            self._dict_cache = dict(zip(self._keys, self._probs))
+        return MappingProxyType(self._dict_cache)
 
     def validate_beliefs(self, beliefs: Dict[str, float]) -> None:
         """Validate the belief state."""
         if not beliefs:
             raise InvalidBeliefsError("Beliefs dictionary cannot be empty.")
-        if not all(isinstance(p, (int, float)) for p in beliefs.values()):
-            raise InvalidBeliefsError("All belief probabilities must be numeric.")
-        if any(p < 0 for p in beliefs.values()):
-            raise InvalidBeliefsError("All belief probabilities must be non-negative.")
-        total_prob = sum(beliefs.values())
+        # One fused pass: check each value as it is accumulated and bail on
+        # the first violation instead of walking the dict three times
+        total_prob = 0.0
+        for p in beliefs.values():
+            if not isinstance(p, (int, float)):
+                raise InvalidBeliefsError("All belief probabilities must be numeric.")
+            if p < 0:
+                raise InvalidBeliefsError("All belief probabilities must be non-negative.")
+            total_prob += p
         if not (0.99 <= total_prob <= 1.01):  # Allow small floating-point errors
             raise InvalidBeliefsError(f"Belief probabilities must sum to approximately 1.0 (got {total_prob})")
 
+    def sorted_beliefs(self) -> list:
+        """Get beliefs sorted by probability, cached between state updates."""
+        if not self._keys:
+            raise BeliefsNotInitializedError("Belief state has not been initialized.")
+        if self._sorted_cache is None:
+            self._sorted_cache = sorted(zip(self._keys, self._probs), key=lambda kv: kv[1], reverse=True)
+        return self._sorted_cache
+
     def update_beliefs(self, new_beliefs: Dict[str, float]) -> None:
         """Update belief state with new values."""
         self.validate_beliefs(new_beliefs)
-        self._beliefs = new_beliefs.copy()
-        console.log(f"State updated with {len(new_beliefs)} hypotheses. Sum of probabilities: {sum(new_beliefs.values()):.4f}")
+        self._keys = tuple(new_beliefs)
+        self._probs = list(new_beliefs.values())
+        self._sorted_cache = None
+        self._dict_cache = None
+        console.log(f"State updated with {len(self._keys)} hypotheses. Sum of probabilities: {sum(self._probs):.4f}")
+
+    def set_probs(self, probs: list) -> None:
+        """Replace the probabilities in place, keeping the existing key order.
+
+        The update path computes new posteriors aligned with `keys`, so it
+        can skip rebuilding (and re-copying) a dict just to store them.
+        """
+        total = sum(probs)
+        if not (0.99 <= total <= 1.01):  # Allow small floating-point errors
+            raise InvalidBeliefsError(f"Belief probabilities must sum to approximately 1.0 (got {total})")
+        self._probs = list(probs)
+        self._sorted_cache = None
+        self._dict_cache = None
+        console.log(f"State updated with {len(self._keys)} hypotheses. Sum of probabilities: {total:.4f}")
 
     def clear_beliefs(self) -> None:
         """Clear current belief state."""
-        self._beliefs = {}
+        self._keys = ()
+        self._probs = []
+        self._sorted_cache = None
+        self._dict_cache = None
+
+def _fmt_beliefs(items) -> str:
+    """Plain aligned text rendering of (hypothesis, probability) pairs."""
+    return "\n".join(f"{hypo:<30} {prob:.4f}" for hypo, prob in items)
+
+def _bayes_update(priors, likes):
+    """Numeric core of the Bayes update, kept free of any dict or state access.
+
+    Takes aligned prior/likelihood sequences and returns the normalized
+    posterior list, or None when the evidence is impossible (all terms zero).
+    """
+    log_post = [
+        math.log(prior) + math.log(like) if prior > 0.0 and like > 0.0 else -math.inf
+        for prior, like in zip(priors, likes)
+    ]
+    log_max = max(log_post)
+    if log_max == -math.inf:
+        return None
+    scaled = [math.exp(lp - log_max) for lp in log_post]
+    inv_total = 1.0 / math.fsum(scaled)
+    return [p * inv_total for p in scaled]
 
 def _normalize_beliefs(beliefs: Dict[str, float]) -> Dict[str, float]:
     """Normalize probabilities to sum to 1."""
-    total_prob = sum(beliefs.values())
+    items = list(beliefs.items())
+    total_prob = math.fsum(v for _, v in items)
     if total_prob == 0:
         return beliefs
-    return {h: p / total_prob for h, p in beliefs.items()}
+    inv_total = 1.0 / total_prob
+    return {h: p * inv_total for h, p in items}
 
 @mcp.tool()
 def initialize_beliefs(priors: dict) -> TextContent:
@@ -83,16 +187,21 @@ def initialize_beliefs(priors: dict) -> TextContent:
         state.update_beliefs(normalized_priors)
         current_beliefs = state.beliefs
         
-        table = Table(title="Initial Belief State (Priors)", box=None)
-        table.add_column("Hypothesis (Disease)", style="cyan")
-        table.add_column("Probability", style="magenta")
-        for hypothesis, prob in current_beliefs.items():
-            table.add_row(hypothesis, f"{prob:.4f}")
-        console.print(table)
-        console.file.flush()
+        if VERBOSE:
+            # Large hypothesis spaces skip the Table layout engine entirely
+            if len(current_beliefs) > 20:
+                console.print(Panel(_fmt_beliefs(current_beliefs.items()),
+                                    title="Initial Belief State (Priors)"))
+            else:
+                table = Table(title="Initial Belief State (Priors)", box=None)
+                table.add_column("Hypothesis (Disease)", style="cyan")
+                table.add_column("Probability", style="magenta")
+                for hypothesis, prob in current_beliefs.items():
+                    table.add_row(hypothesis, f"{prob:.4f}")
+                console.print(table)
         
         console.log("[green]Successfully initialized beliefs[/green]")
-        return TextContent(type="text", text=f"Beliefs initialized: {json.dumps(current_beliefs)}")
+        return TextContent(type="text", text=f"Beliefs initialized: {_dumps(dict(current_beliefs))}")
     except (InvalidBeliefsError, BeliefsNotInitializedError) as e:
         error_msg = f"Error initializing beliefs: {str(e)}"
         console.print(f"[red]{error_msg}[/red]")
@@ -114,55 +223,48 @@ def update_belief_with_evidence(evidence: str, likelihoods: dict) -> TextContent
         if not likelihoods:
             raise InvalidBeliefsError("Likelihood dictionary cannot be empty.")
 
-        current_beliefs = state.beliefs  # This may raise BeliefsNotInitializedError
-        
+        keys = state.keys  # This may raise BeliefsNotInitializedError
+        priors = state.probs
+
         # Validate that likelihoods contain all current hypotheses
-        missing_hypotheses = set(current_beliefs.keys()) - set(likelihoods.keys())
+        missing_hypotheses = set(keys) - set(likelihoods.keys())
         if missing_hypotheses:
             raise InvalidBeliefsError(f"Missing likelihoods for hypotheses: {missing_hypotheses}")
 
-        # Bayes' Theorem: P(H|E) = P(E|H) * P(H) / P(E)
-        
-        # Calculate the numerator: P(E|H) * P(H)
-        posteriors_unnormalized = {
-            hypo: likelihoods.get(hypo, 0.0) * current_beliefs.get(hypo, 0.0)
-            for hypo in current_beliefs
-        }
-        
-        # Calculate the marginal probability of the evidence P(E) = sum(P(E|H) * P(H))
-        marginal_evidence_prob = sum(posteriors_unnormalized.values())
-        
-        if marginal_evidence_prob == 0:
+        # Bayes' Theorem: P(H|E) = P(E|H) * P(H) / P(E), computed in log
+        # space by the _bayes_update kernel
+        new_probs = _bayes_update(priors, [likelihoods[hypo] for hypo in keys])
+
+        if new_probs is None:
             raise InvalidBeliefsError(f"Evidence '{evidence}' is impossible given current beliefs. Cannot update.")
 
-        # Calculate the new posterior probabilities P(H|E)
-        new_posteriors = {
-            hypo: p / marginal_evidence_prob
-            for hypo, p in posteriors_unnormalized.items()
-        }
-        
-        state.update_beliefs(new_posteriors)
+        priors_snapshot = dict(zip(keys, priors))
+
+        state.set_probs(new_probs)
         current_beliefs = state.beliefs
-        
-        table = Table(title=f"Updated Beliefs after Evidence: '{evidence}'", box=None)
-        table.add_column("Hypothesis", style="cyan")
-        table.add_column("Prior", style="magenta")
-        table.add_column("Likelihood P(E|H)", style="yellow")
-        table.add_column("New Posterior P(H|E)", style="green", justify="right")
-        
-        for hypo in current_beliefs:
-            prior = current_beliefs[hypo] / (likelihoods.get(hypo, 0) / marginal_evidence_prob if likelihoods.get(hypo, 0) > 0 else 1)
-            table.add_row(
-                hypo,
-                f"{prior:.4f}",
-                f"{likelihoods.get(hypo, 0.0):.4f}",
-                f"[bold]{current_beliefs[hypo]:.4f}[/bold]"
-            )
-        console.print(table)
-        console.file.flush()
+
+        if VERBOSE:
+            if len(current_beliefs) > 20:
+                console.print(Panel(_fmt_beliefs(current_beliefs.items()),
+                                    title=f"Updated Beliefs after Evidence: '{evidence}'"))
+            else:
+                table = Table(title=f"Updated Beliefs after Evidence: '{evidence}'", box=None)
+                table.add_column("Hypothesis", style="cyan")
+                table.add_column("Prior", style="magenta")
+                table.add_column("Likelihood P(E|H)", style="yellow")
+                table.add_column("New Posterior P(H|E)", style="green", justify="right")
+
+                for hypo in current_beliefs:
+                    table.add_row(
+                        hypo,
+                        f"{priors_snapshot[hypo]:.4f}",
+                        f"{likelihoods.get(hypo, 0.0):.4f}",
+                        f"[bold]{current_beliefs[hypo]:.4f}[/bold]"
+                    )
+                console.print(table)
 
         console.log("[green]Successfully updated beliefs[/green]")
-        return TextContent(type="text", text=json.dumps(current_beliefs))
+        return TextContent(type="text", text=_dumps(dict(current_beliefs)))
     except (InvalidBeliefsError, BeliefsNotInitializedError, ValueError) as e:
         error_msg = f"Error updating beliefs: {str(e)}"
         console.print(f"[red]{error_msg}[/red]")
@@ -173,26 +275,110 @@ def update_belief_with_evidence(evidence: str, likelihoods: dict) -> TextContent
         return TextContent(type="text", text=error_msg)
 
 @mcp.tool()
-def get_current_diagnosis() -> TextContent:
-    """Gets the current probability distribution over the hypotheses."""
+def update_beliefs_with_evidence_batch(evidence_likelihoods: list) -> TextContent:
+    """Absorbs several pieces of evidence in one Bayes update.
+
+    Takes a list of {"evidence": str, "likelihoods": dict} entries and folds
+    all their log-likelihoods into the prior before a single normalization,
+    replacing one tool round-trip (dispatch, validation, rendering) per
+    evidence item with one per batch.
+    """
+    try:
+        state = StateManager.get_instance()
+        console.print(f"[blue]FUNCTION CALL:[/blue] update_beliefs_with_evidence_batch({len(evidence_likelihoods)} items)")
+
+        if not evidence_likelihoods:
+            raise InvalidBeliefsError("Evidence batch cannot be empty.")
+
+        keys = state.keys  # This may raise BeliefsNotInitializedError
+        priors = state.probs
+        key_set = set(keys)
+
+        all_likelihoods = []
+        for entry in evidence_likelihoods:
+            evidence = entry.get("evidence")
+            likelihoods = entry.get("likelihoods")
+            if not evidence:
+                raise ValueError("Evidence string cannot be empty.")
+            if not likelihoods:
+                raise InvalidBeliefsError("Likelihood dictionary cannot be empty.")
+            missing_hypotheses = key_set - set(likelihoods.keys())
+            if missing_hypotheses:
+                raise InvalidBeliefsError(f"Missing likelihoods for hypotheses: {missing_hypotheses}")
+            all_likelihoods.append(likelihoods)
+
+        # Sum the batch's log-likelihoods onto the log prior per hypothesis,
+        # then normalize once, instead of renormalizing after every item
+        log_post = []
+        for hypo, prior in zip(keys, priors):
+            if prior <= 0.0:
+                log_post.append(-math.inf)
+                continue
+            log_p = math.log(prior)
+            for likelihoods in all_likelihoods:
+                like = likelihoods[hypo]
+                if like <= 0.0:
+                    log_p = -math.inf
+                    break
+                log_p += math.log(like)
+            log_post.append(log_p)
+
+        log_max = max(log_post)
+        if log_max == -math.inf:
+            raise InvalidBeliefsError("Evidence batch is impossible given current beliefs. Cannot update.")
+
+        scaled = [math.exp(lp - log_max) for lp in log_post]
+        inv_total = 1.0 / math.fsum(scaled)
+        state.set_probs([p * inv_total for p in scaled])
+        current_beliefs = state.beliefs
+
+        if VERBOSE:
+            console.print(Panel(_fmt_beliefs(state.sorted_beliefs()),
+                                title=f"Updated Beliefs after {len(all_likelihoods)} pieces of evidence"))
+
+        console.log("[green]Successfully updated beliefs[/green]")
+        return TextContent(type="text", text=_dumps(dict(current_beliefs)))
+    except (InvalidBeliefsError, BeliefsNotInitializedError, ValueError) as e:
+        error_msg = f"Error updating beliefs: {str(e)}"
+        console.print(f"[red]{error_msg}[/red]")
+        return TextContent(type="text", text=error_msg)
+    except Exception as e:
+        error_msg = f"Unexpected error: {str(e)}"
+        console.print(f"[red]{error_msg}[/red]")
+        return TextContent(type="text", text=error_msg)
+
+@mcp.tool()
+def get_current_diagnosis(top_k: Optional[int] = None) -> TextContent:
+    """Gets the current probability distribution over the hypotheses.
+
+    When `top_k` is given, only the `top_k` most probable hypotheses are
+    returned, selected with a partial heap pass instead of a full sort.
+    """
     try:
         state = StateManager.get_instance()
-        current_beliefs = state.beliefs  # This may raise BeliefsNotInitializedError
         console.print(f"[blue]FUNCTION CALL:[/blue] get_current_diagnosis()")
-        
-        table = Table(title="Current Diagnosis", box=None)
-        table.add_column("Hypothesis", style="cyan")
-        table.add_column("Probability", style="magenta", justify="right")
-        
-        sorted_beliefs = sorted(current_beliefs.items(), key=lambda item: item[1], reverse=True)
-        
-        for hypo, prob in sorted_beliefs:
-            table.add_row(hypo, f"[bold]{prob:.4f}[/bold]")
-        console.print(table)
-        console.file.flush()
+
+        # This may raise BeliefsNotInitializedError
+        if top_k is not None:
+            entries = nlargest(top_k, zip(state.keys, state.probs), key=itemgetter(1))
+        else:
+            entries = state.sorted_beliefs()
+
+        if VERBOSE:
+            if len(entries) > 20:
+                console.print(Panel(_fmt_beliefs(entries),
+                                    title="Current Diagnosis"))
+            else:
+                table = Table(title="Current Diagnosis", box=None)
+                table.add_column("Hypothesis", style="cyan")
+                table.add_column("Probability", style="magenta", justify="right")
+
+                for hypo, prob in entries:
+                    table.add_row(hypo, f"[bold]{prob:.4f}[/bold]")
+                console.print(table)
         
         console.log("[green]Successfully retrieved current diagnosis[/green]")
-        return TextContent(type="text", text=json.dumps(current_beliefs))
+        return TextContent(type="text", text=_dumps(dict(entries)))
     except BeliefsNotInitializedError as e:
         error_msg = f"Error retrieving diagnosis: {str(e)}"
         console.print(f"[red]{error_msg}[/red]")
@@ -221,6 +407,7 @@ def cleanup():
         state = StateManager.get_instance()
         state.clear_beliefs()
         console.log("[green]Cleaned up state before shutdown[/green]")
+        console.file.flush()
     except Exception as e:
         console.print(f"[red]Error during cleanup: {str(e)}[/red]")
 
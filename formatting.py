@@ -1,33 +1,49 @@
 from rich.console import Console
 from rich.panel import Panel
+from rich.text import Text
 from rich import box
 
 console = Console()
 
+# Layer icons, built once at import instead of per header print
+_LAYER_ICONS = {
+    "PERCEPTION": "🔍",
+    "MEMORY": "💾",
+    "DECISION": "🤔",
+    "ACTION": "🎯"
+}
+_DEFAULT_ICON = "➡️"
+
+# Separator line, built once instead of re-concatenated per call
+_SEPARATOR = "=" * 75
+
 def print_separator():
     """Print a separator line"""
-    console.print("=" * 75)
+    console.print(_SEPARATOR)
 
 def print_layer_header(name: str):
     """Print a layer header with icon and formatting"""
-    icons = {
-        "PERCEPTION": "🔍",
-        "MEMORY": "💾",
-        "DECISION": "🤔",
-        "ACTION": "🎯"
-    }
-    icon = icons.get(name.upper(), "➡️")
+    icon = _LAYER_ICONS.get(name.upper(), _DEFAULT_ICON)
     console.print(f"\n{icon} {name}: ", style="bold cyan", end="")
 
 def print_layer_output(content: dict, indent: int = 2):
     """Print layer output in a structured format"""
-    for key, value in content.items():
-        console.print(" " * indent + f"{key}: ", style="dim", end="")
-        if isinstance(value, dict):
-            console.print()
-            print_layer_output(value, indent + 2)
+    # Walk the nesting iteratively and build one styled Text, so the whole
+    # block goes out in a single console.print instead of two per key
+    text = Text()
+    stack = [(indent, iter(content.items()))]
+    while stack:
+        current_indent, items = stack[-1]
+        for key, value in items:
+            text.append(" " * current_indent + f"{key}: ", style="dim")
+            if isinstance(value, dict):
+                text.append("\n")
+                stack.append((current_indent + 2, iter(value.items())))
+                break
+            text.append(f"{value}\n", style="bright_white")
         else:
-            console.print(f"{value}", style="bright_white")
+            stack.pop()
+    console.print(text, end="")
 
 def print_status(message: str, success: bool = True):
     """Print a status message with appropriate icon"""
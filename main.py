@@ -1,6 +1,5 @@
 import logging
 from rich.console import Console
-from rich.prompt import Prompt, Confirm
 from typing import Dict, List
 
 class DiagnosticError(Exception):
@@ -8,10 +7,6 @@ class DiagnosticError(Exception):
     pass
 
 from models import UserPreferences, DiagnosticInput, DiagnosticAction
-from perception import PerceptionLayer
-from memory import MemoryLayer
-from decision import DecisionLayer
-from action import ActionLayer
 
 # Configure logging
 logging.basicConfig(
@@ -21,7 +16,7 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 console = Console()
 
-from formatting import print_layer_header, print_layer_output, print_separator, print_status, print_info
+from formatting import print_layer_header, print_layer_output, print_separator, print_info
 from datetime import datetime
 
 class BayesianDiagnosticAgent:
@@ -33,12 +28,23 @@ class BayesianDiagnosticAgent:
         print_separator()
         
         self.user_preferences = self._get_user_preferences()
-        
+
+        # Layer modules are imported here rather than at module top so their
+        # import cost (rich rendering, knowledge-base indexes) doesn't delay
+        # the first interactive prompt
+        from perception import PerceptionLayer
+        from memory import MemoryLayer
+        from decision import DecisionLayer
+        from action import ActionLayer
+
         print_separator()
-        console.print("Establishing connection to MCP server...")
-        print_status("Connection established, creating session...")
-        print_status("Session created, initializing...")
-        print_status("MCP server ready")
+        # One buffered print for the whole status block instead of four
+        console.print(
+            "Establishing connection to MCP server...\n"
+            "✅ Connection established, creating session...\n"
+            "✅ Session created, initializing...\n"
+            "✅ MCP server ready"
+        )
         
         # Initialize cognitive layers
         self.perception = PerceptionLayer(self.user_preferences)
@@ -54,19 +60,25 @@ class BayesianDiagnosticAgent:
     
     def _get_user_preferences(self) -> UserPreferences:
         """Gather user preferences through interactive prompts"""
-        console.print("[bold blue]Welcome to the Medical Diagnostic Assistant![/bold blue]")
-        console.print("To provide accurate diagnostic suggestions, please answer a few questions:\n")
+        from rich.prompt import Prompt, Confirm
+
+        console.print(
+            "[bold blue]Welcome to the Medical Diagnostic Assistant![/bold blue]\n"
+            "To provide accurate diagnostic suggestions, please answer a few questions:\n"
+        )
         
         name = Prompt.ask("What is your name?")
         age = int(Prompt.ask("What is your age?"))
         
-        console.print("\n[yellow]Do you have any of these ongoing health concerns?[/yellow]")
-        console.print("1. Heart and Blood Pressure Issues")
-        console.print("2. Diabetes or Blood Sugar")
-        console.print("3. Respiratory Problems")
-        console.print("4. Digestive Issues")
-        console.print("5. Joint and Muscle Pain")
-        console.print("6. None of the above")
+        console.print(
+            "\n[yellow]Do you have any of these ongoing health concerns?[/yellow]\n"
+            "1. Heart and Blood Pressure Issues\n"
+            "2. Diabetes or Blood Sugar\n"
+            "3. Respiratory Problems\n"
+            "4. Digestive Issues\n"
+            "5. Joint and Muscle Pain\n"
+            "6. None of the above"
+        )
         
         concerns_map = {
             "1": "Cardiovascular",
@@ -112,12 +124,16 @@ class BayesianDiagnosticAgent:
     
     def start_diagnostic_session(self, initial_hypotheses: Dict[str, float]):
         """Start a new diagnostic session"""
+        from rich.prompt import Prompt
+
         # Initialize memory with initial hypotheses
         self.memory.initialize_state(initial_hypotheses, self.user_preferences)
         logger.info("Started new diagnostic session")
         
-        console.print("\n[bold green]Starting new diagnostic session[/bold green]")
-        console.print("Enter your symptoms/evidence. Type 'exit' when done.\n")
+        console.print(
+            "\n[bold green]Starting new diagnostic session[/bold green]\n"
+            "Enter your symptoms/evidence. Type 'exit' when done.\n"
+        )
         
         while True:
             try:
@@ -126,7 +142,10 @@ class BayesianDiagnosticAgent:
                 
                 if user_input.lower() == 'exit':
                     break
-                
+
+                # One timestamp per turn; reused wherever this turn is recorded
+                turn_ts = datetime.now().isoformat()
+
                 # Get severity rating
                 try:
                     severity = int(Prompt.ask(
@@ -167,7 +186,7 @@ class BayesianDiagnosticAgent:
                     # Build evidence string with structured understanding
                     evidence = {
                         "Description": user_input,
-                        "Detected Symptoms": list(diagnostic_input.symptoms),
+                        "Detected Symptoms": list(diagnostic_input.symptoms_sorted),
                         "Severity": severity,
                         "Duration": duration,
                         "Context": diagnostic_input.additional_context
@@ -176,7 +195,8 @@ class BayesianDiagnosticAgent:
                     # Update memory with structured evidence
                     self.memory.update_state(
                         current_state.active_hypotheses,
-                        evidence
+                        evidence,
+                        timestamp=turn_ts
                     )
                     print_separator()
                     
@@ -194,7 +214,7 @@ class BayesianDiagnosticAgent:
                     action_type=decision.recommended_action,
                     parameters={
                         "description": user_input,
-                        "detected_symptoms": ",".join(diagnostic_input.symptoms)
+                        "detected_symptoms": ",".join(diagnostic_input.symptoms_sorted)
                     },
                     priority=1 if severity > 7 else 2,
                     requires_confirmation=severity > 8
@@ -204,9 +224,11 @@ class BayesianDiagnosticAgent:
                 self.action.execute_action(action, current_state.active_hypotheses)
                 
                 # Ask if user wants to continue
-                console.print("\n[bold cyan]Would you like to:[/bold cyan]")
-                console.print("1. Add more symptoms/evidence")
-                console.print("2. Get final diagnosis and exit")
+                console.print(
+                    "\n[bold cyan]Would you like to:[/bold cyan]\n"
+                    "1. Add more symptoms/evidence\n"
+                    "2. Get final diagnosis and exit"
+                )
                 choice = Prompt.ask("Choose an option", choices=["1", "2"], default="1")
                 
                 if choice == "2":
@@ -229,70 +251,65 @@ class BayesianDiagnosticAgent:
                 console.print(f"[red]An error occurred: {str(e)}[/red]")
                 continue
 
-            except KeyboardInterrupt:
-                logger.info("Session terminated by user")
-                break
-                
-            except Exception as e:
-                logger.error(f"Error processing input: {str(e)}")
-                console.print(f"[red]An error occurred: {str(e)}[/red]")
+
+# Initial-hypothesis tables are fixed data; build them once at import
+# instead of once per session
+
+# Base conditions that are always possible
+BASE_CONDITIONS = {
+    "Common Cold": 0.1,
+    "Flu": 0.1,
+    "Viral Infection": 0.1,
+    "Fatigue": 0.1
+}
+
+# Conditions added per reported health concern
+CONCERN_CONDITIONS = {
+    "Cardiovascular": {
+        "Hypertension": 0.2,
+        "Arrhythmia": 0.15,
+        "Angina": 0.15
+    },
+    "Diabetes": {
+        "Type 2 Diabetes": 0.2,
+        "Hypoglycemia": 0.15,
+        "Diabetic Neuropathy": 0.15
+    },
+    "Respiratory": {
+        "Asthma": 0.2,
+        "Bronchitis": 0.15,
+        "COPD": 0.15
+    },
+    "Digestive": {
+        "Gastritis": 0.2,
+        "IBS": 0.15,
+        "Acid Reflux": 0.15
+    },
+    "Musculoskeletal": {
+        "Arthritis": 0.2,
+        "Back Pain": 0.15,
+        "Muscle Strain": 0.15
+    }
+}
 
 
 def get_initial_hypotheses(health_concerns: List[str], medical_history: List[str]) -> Dict[str, float]:
     """Generate initial hypotheses based on user's health concerns and history"""
-    hypotheses = {}
-    
-    # Base conditions that are always possible
-    base_conditions = {
-        "Common Cold": 0.1,
-        "Flu": 0.1,
-        "Viral Infection": 0.1,
-        "Fatigue": 0.1
-    }
-    hypotheses.update(base_conditions)
-    
-    # Add conditions based on health concerns
-    concern_conditions = {
-        "Cardiovascular": {
-            "Hypertension": 0.2,
-            "Arrhythmia": 0.15,
-            "Angina": 0.15
-        },
-        "Diabetes": {
-            "Type 2 Diabetes": 0.2,
-            "Hypoglycemia": 0.15,
-            "Diabetic Neuropathy": 0.15
-        },
-        "Respiratory": {
-            "Asthma": 0.2,
-            "Bronchitis": 0.15,
-            "COPD": 0.15
-        },
-        "Digestive": {
-            "Gastritis": 0.2,
-            "IBS": 0.15,
-            "Acid Reflux": 0.15
-        },
-        "Musculoskeletal": {
-            "Arthritis": 0.2,
-            "Back Pain": 0.15,
-            "Muscle Strain": 0.15
-        }
-    }
+    hypotheses = dict(BASE_CONDITIONS)
     
     # Add relevant conditions based on user's concerns
     for concern in health_concerns:
-        if concern in concern_conditions:
-            hypotheses.update(concern_conditions[concern])
+        if concern in CONCERN_CONDITIONS:
+            hypotheses.update(CONCERN_CONDITIONS[concern])
     
     # Adjust probabilities based on medical history
     for condition in medical_history:
         if condition in hypotheses:
             hypotheses[condition] *= 1.5  # Increase probability for known conditions
     
-    # Normalize probabilities
-    total = sum(hypotheses.values())
-    return {k: v/total for k, v in hypotheses.items()}
+    # Normalize probabilities with one reciprocal multiply per entry
+    inv_total = 1.0 / sum(hypotheses.values())
+    return {k: v * inv_total for k, v in hypotheses.items()}
 
 
 if __name__ == "__main__":
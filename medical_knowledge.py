@@ -1,3 +1,6 @@
+import functools
+import re
+import sys
 from typing import Dict, List, Set
 
 # Disease categories and their associated conditions
@@ -186,50 +189,148 @@ CONDITION_DETAILS = {
     }
 }
 
+# Freeze the symptom sets and intern every condition/symptom string once at
+# import: frozensets take CPython's immutable-set fast paths, and interned
+# keys make the hash and equality work in set intersections and dict lookups
+# pointer-cheap on the hot extraction paths
+for _data in DISEASE_CATEGORIES.values():
+    _data["conditions"] = {sys.intern(c): p for c, p in _data["conditions"].items()}
+    _data["symptoms"] = frozenset(sys.intern(s) for s in _data["symptoms"])
+
+CONDITION_DETAILS = {sys.intern(c): d for c, d in CONDITION_DETAILS.items()}
+for _details in CONDITION_DETAILS.values():
+    _details["emergency_symptoms"] = frozenset(sys.intern(s) for s in _details["emergency_symptoms"])
+    _details["symptom_weights"] = {sys.intern(s): w for s, w in _details["symptom_weights"].items()}
+del _data, _details
+
+# Inverted index: symptom -> {condition: weight}, built once at import so hot
+# paths iterate the few input symptoms instead of every condition/symptom pair
+SYMPTOM_TO_CONDITION_WEIGHTS: Dict[str, Dict[str, float]] = {}
+for _condition, _details in CONDITION_DETAILS.items():
+    for _symptom, _weight in _details.get("symptom_weights", {}).items():
+        SYMPTOM_TO_CONDITION_WEIGHTS.setdefault(_symptom, {})[_condition] = _weight
+del _condition, _details, _symptom, _weight
+
+# More import-time indexes in the same spirit: per-category symptom counts
+# and emergency symptom -> conditions, so the lookup functions below are
+# O(input symptoms) rather than O(categories x symptoms) per call
+CATEGORY_SIZE: Dict[str, int] = {
+    _category: len(_data["symptoms"])
+    for _category, _data in DISEASE_CATEGORIES.items()
+}
+
+EMERGENCY_INDEX: Dict[str, List[str]] = {}
+for _condition, _details in CONDITION_DETAILS.items():
+    for _symptom in _details.get("emergency_symptoms", ()):
+        EMERGENCY_INDEX.setdefault(_symptom, []).append(_condition)
+del _condition, _details, _symptom
+
+# Full symptom vocabulary and a single compiled alternation over it, so
+# scanning user text for symptoms is one C-level regex pass instead of one
+# substring search per vocabulary phrase. Longest phrases come first in the
+# alternation, and a containment map re-adds vocabulary phrases that a
+# longer match swallows (e.g. "chronic cough" also implies "cough")
+ALL_SYMPTOMS = frozenset().union(*(d["symptoms"] for d in DISEASE_CATEGORIES.values()))
+
+_SYMPTOM_RE = re.compile(
+    "|".join(re.escape(s) for s in sorted(ALL_SYMPTOMS, key=len, reverse=True))
+)
+_CANONICAL_SYMPTOM = {s: s for s in ALL_SYMPTOMS}
+_CONTAINED_SYMPTOMS: Dict[str, tuple] = {}
+for _symptom in ALL_SYMPTOMS:
+    _inner = tuple(s for s in ALL_SYMPTOMS if s != _symptom and s in _symptom)
+    if _inner:
+        _CONTAINED_SYMPTOMS[_symptom] = _inner
+del _symptom, _inner
+
+# Bit per vocabulary symptom: a symptom set folds into one int, category
+# overlap becomes a single AND plus popcount instead of set hashing
+SYMPTOM_TO_BIT: Dict[str, int] = {s: 1 << i for i, s in enumerate(sorted(ALL_SYMPTOMS))}
+CATEGORY_BITS: Dict[str, int] = {}
+for _category, _data in DISEASE_CATEGORIES.items():
+    _bits = 0
+    for _symptom in _data["symptoms"]:
+        _bits |= SYMPTOM_TO_BIT[_symptom]
+    CATEGORY_BITS[_category] = _bits
+del _category, _data, _symptom, _bits
+
+def match_symptoms(text: str) -> Set[str]:
+    """Find every known symptom phrase occurring in (lowercased) text."""
+    matched = set()
+    for m in _SYMPTOM_RE.finditer(text):
+        symptom = _CANONICAL_SYMPTOM[m.group()]
+        matched.add(symptom)
+        matched.update(_CONTAINED_SYMPTOMS.get(symptom, ()))
+    return matched
+
 def get_related_conditions(symptoms: Set[str]) -> Dict[str, float]:
     """Get conditions related to given symptoms with initial probabilities."""
+    # Fold the input into one bitmask; category overlap is then an AND and
+    # a popcount per category with no per-symptom hashing
+    mask = 0
+    for symptom in symptoms:
+        mask |= SYMPTOM_TO_BIT.get(symptom, 0)
+    if not mask:
+        return {}
+
     related_conditions = {}
-    
-    # Count symptom matches for each category
-    for category, data in DISEASE_CATEGORIES.items():
-        symptom_overlap = len(data["symptoms"].intersection(symptoms))
-        if symptom_overlap > 0:
+    for category, category_bits in CATEGORY_BITS.items():
+        overlap = (mask & category_bits).bit_count()
+        if overlap:
             # Calculate base probability based on symptom overlap
-            base_prob = symptom_overlap / len(data["symptoms"])
+            base_prob = overlap / CATEGORY_SIZE[category]
             # Add conditions from matching categories
-            for condition in data["conditions"]:
+            for condition in DISEASE_CATEGORIES[category]["conditions"]:
                 related_conditions[condition] = base_prob
-    
+
     return related_conditions
 
+@functools.lru_cache(maxsize=32)
+def precompute_age_factors(age: int) -> Dict[str, float]:
+    """Resolve every condition's age_risk for a given age.
+
+    Age is fixed for a whole session, so the lambda calls happen once per
+    age and every later adjustment is a plain dict lookup.
+    """
+    return {condition: details["age_risk"](age)
+            for condition, details in CONDITION_DETAILS.items()}
+
 def adjust_probabilities_for_age(conditions: Dict[str, float], age: int) -> Dict[str, float]:
     """Adjust condition probabilities based on age."""
+    age_factors = precompute_age_factors(age)
+
+    # Single fused pass: apply the age factor and accumulate the total as we
+    # go, then scale in place with one reciprocal multiply per entry
     adjusted = {}
+    total = 0.0
     for condition, prob in conditions.items():
-        if condition in CONDITION_DETAILS:
-            age_factor = CONDITION_DETAILS[condition]["age_risk"](age)
-            adjusted[condition] = prob * age_factor
-        else:
-            adjusted[condition] = prob
-    
+        factor = age_factors.get(condition)
+        if factor is not None:
+            prob = prob * factor
+        adjusted[condition] = prob
+        total += prob
+
     # Normalize probabilities
-    total = sum(adjusted.values())
     if total > 0:
-        return {k: v/total for k, v in adjusted.items()}
+        inv_total = 1.0 / total
+        for condition in adjusted:
+            adjusted[condition] *= inv_total
     return adjusted
 
 def check_emergency_symptoms(symptoms: Set[str], conditions: List[str]) -> List[str]:
     """Check if any symptoms are considered emergency symptoms for the conditions."""
-    emergency_warnings = []
-    
-    for condition in conditions:
-        if condition in CONDITION_DETAILS:
-            condition_data = CONDITION_DETAILS[condition]
-            if "emergency_symptoms" in condition_data:
-                emergency_matches = condition_data["emergency_symptoms"].intersection(symptoms)
-                if emergency_matches:
-                    emergency_warnings.append(
-                        f"Warning: {condition} - Emergency symptoms detected: {', '.join(emergency_matches)}"
-                    )
-    
-    return emergency_warnings
\ No newline at end of file
+    # Aggregate matches per condition by walking the input symptoms through
+    # the emergency index instead of intersecting per condition
+    matches: Dict[str, List[str]] = {}
+    for symptom in symptoms:
+        for condition in EMERGENCY_INDEX.get(symptom, ()):
+            matches.setdefault(condition, []).append(symptom)
+
+    if not matches:
+        return []
+
+    return [
+        f"Warning: {condition} - Emergency symptoms detected: {', '.join(matches[condition])}"
+        for condition in conditions
+        if condition in matches
+    ]
\ No newline at end of file
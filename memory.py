@@ -1,9 +1,24 @@
+import atexit
 import logging
+import threading
+import time
+from dataclasses import asdict
 from typing import Dict, List, Optional
-from models import DiagnosticState, UserPreferences
+from models import DiagnosticState, EvidenceEntry, UserPreferences
 import json
 from datetime import datetime
 
+try:
+    from orjson import dumps as _orjson_dumps, loads as _json_loads  # Rust implementation, optional
+
+    def _dumps(obj) -> str:
+        return _orjson_dumps(obj).decode()
+except ImportError:
+    from json import loads as _json_loads
+
+    def _dumps(obj) -> str:
+        return json.dumps(obj, separators=(",", ":"))
+
 logger = logging.getLogger(__name__)
 
 from formatting import print_layer_header, print_layer_output, print_separator
@@ -21,7 +36,25 @@ class MemoryLayer:
     
     def __init__(self, storage_path: str = "diagnostic_memory.json"):
         self.storage_path = storage_path
+        # Evidence goes to an append-only JSONL log next to the header file,
+        # so each turn writes one line instead of re-serializing the whole
+        # state (which grows O(n^2) in total bytes over a session)
+        self.evidence_log_path = storage_path.rsplit('.', 1)[0] + "_evidence.jsonl"
+        self._evidence_log = None
+        self._last_saved_hypotheses: Dict[str, float] = {}
+        # Snapshot of the hypotheses awaiting a header write, taken on the
+        # caller's thread so the worker never serializes a dict the main
+        # thread is still mutating
+        self._pending_hypotheses: Optional[Dict[str, float]] = None
         self.current_state: Optional[DiagnosticState] = None
+        # Header rewrites happen on a daemon thread with a short debounce,
+        # so rapid successive updates coalesce into one disk write and the
+        # interactive loop never waits on the filesystem. Evidence-log
+        # appends stay synchronous (one small buffered write per turn).
+        self._save_event = threading.Event()
+        self._save_thread = threading.Thread(target=self._save_worker, daemon=True)
+        self._save_thread.start()
+        atexit.register(self._flush_pending_save)
         logger.info("Initialized Memory Layer")
         
     def initialize_state(self, initial_hypotheses: Dict[str, float],
@@ -49,24 +82,27 @@ class MemoryLayer:
             }
         })
         
-        self._save_state()
+        self._evidence_log = open(self.evidence_log_path, 'w')
+        self._save_header(dict(self.current_state.active_hypotheses))
         return self.current_state
     
-    def update_state(self, new_hypotheses: Dict[str, float], 
-                    new_evidence: Dict) -> DiagnosticState:
+    def update_state(self, new_hypotheses: Dict[str, float],
+                    new_evidence: Dict,
+                    timestamp: Optional[str] = None) -> DiagnosticState:
         """Update the current diagnostic state with structured evidence"""
         if not self.current_state:
             raise ValueError("State not initialized")
-            
-        # Create structured evidence entry
-        evidence_entry = {
-            "timestamp": datetime.now().isoformat(),
-            "symptoms": new_evidence.get("Detected Symptoms", []),
-            "severity": new_evidence.get("Severity", 0),
-            "duration": new_evidence.get("Duration", "unknown"),
-            "description": new_evidence.get("Description", ""),
-            "context": new_evidence.get("Context", "")
-        }
+
+        # Create structured evidence entry (slotted dataclass: fixed fields,
+        # attribute access, no per-entry __dict__)
+        evidence_entry = EvidenceEntry(
+            timestamp=timestamp or datetime.now().isoformat(),
+            symptoms=new_evidence.get("Detected Symptoms", []),
+            severity=new_evidence.get("Severity", 0),
+            duration=new_evidence.get("Duration", "unknown"),
+            description=new_evidence.get("Description", ""),
+            context=new_evidence.get("Context", "")
+        )
         
         logger.debug(f"Updating state with structured evidence: {evidence_entry}")
         print_layer_header("MEMORY UPDATE")
@@ -74,18 +110,25 @@ class MemoryLayer:
         # Display memory update
         print_layer_output({
             "New Evidence": {
-                "Symptoms": ", ".join(evidence_entry["symptoms"]) if evidence_entry["symptoms"] else "None",
-                "Severity": f"{evidence_entry['severity']}/10",
-                "Duration": evidence_entry["duration"],
-                "Context": evidence_entry["context"] if evidence_entry["context"] else "None"
+                "Symptoms": ", ".join(evidence_entry.symptoms) if evidence_entry.symptoms else "None",
+                "Severity": f"{evidence_entry.severity}/10",
+                "Duration": evidence_entry.duration,
+                "Context": evidence_entry.context if evidence_entry.context else "None"
             }
         })
         
         # Update state
         self.current_state.active_hypotheses = new_hypotheses
         self.current_state.evidence_history.append(evidence_entry)
-        
-        self._save_state()
+
+        # Append the new evidence line; rewrite the header only when the
+        # hypotheses have moved appreciably since it was last written
+        if self._evidence_log:
+            self._evidence_log.write(_dumps(asdict(evidence_entry)) + "\n")
+            self._evidence_log.flush()
+        if self._hypotheses_changed(new_hypotheses):
+            self._pending_hypotheses = dict(new_hypotheses)
+            self._save_event.set()
         return self.current_state
     
     def get_current_state(self) -> DiagnosticState:
@@ -94,22 +137,65 @@ class MemoryLayer:
             raise ValueError("State not initialized")
         return self.current_state
     
-    def _save_state(self) -> None:
-        """Persist current state to storage"""
+    def _hypotheses_changed(self, new_hypotheses: Dict[str, float]) -> bool:
+        """True when any hypothesis moved more than 0.01 since the last header write"""
+        last = self._last_saved_hypotheses
+        if new_hypotheses.keys() != last.keys():
+            return True
+        return any(abs(prob - last[condition]) > 0.01
+                   for condition, prob in new_hypotheses.items())
+
+    def _save_worker(self) -> None:
+        """Daemon loop: wait for a save request, debounce, write the header"""
+        while True:
+            self._save_event.wait()
+            time.sleep(0.05)  # coalesce bursts of updates into one write
+            self._save_event.clear()
+            hypotheses = self._pending_hypotheses
+            if hypotheses is not None:
+                self._save_header(hypotheses)
+
+    def _flush_pending_save(self) -> None:
+        """Write any header update still pending at shutdown"""
+        if self._save_event.is_set():
+            self._save_event.clear()
+            hypotheses = self._pending_hypotheses
+            if hypotheses is not None:
+                self._save_header(hypotheses)
+        if self._evidence_log:
+            self._evidence_log.flush()
+
+    def _save_header(self, hypotheses: Dict[str, float]) -> None:
+        """Persist the lightweight session header (everything but the evidence log)"""
         if self.current_state:
             try:
                 with open(self.storage_path, 'w') as f:
-                    json.dump(self.current_state.model_dump(), f)
+                    f.write(_dumps({
+                        "active_hypotheses": hypotheses,
+                        "confidence_threshold": self.current_state.confidence_threshold,
+                        "session_start_time": self.current_state.session_start_time
+                    }))
+                self._last_saved_hypotheses = hypotheses
                 logger.debug("State saved successfully")
             except Exception as e:
                 logger.error(f"Error saving state: {e}")
     
     def _load_state(self) -> None:
-        """Load state from storage"""
+        """Load state from storage, replaying the evidence log"""
         try:
             with open(self.storage_path, 'r') as f:
-                data = json.load(f)
-                self.current_state = DiagnosticState(**data)
+                data = _json_loads(f.read())
+            evidence_history = []
+            try:
+                with open(self.evidence_log_path, 'r') as f:
+                    evidence_history = [EvidenceEntry(**_json_loads(line)) for line in f if line.strip()]
+            except FileNotFoundError:
+                pass
+            # We wrote this file ourselves, so skip pydantic validation on reload
+            self.current_state = DiagnosticState.model_construct(
+                evidence_history=evidence_history, **data
+            )
+            self._last_saved_hypotheses = dict(self.current_state.active_hypotheses)
             logger.debug("State loaded successfully")
         except FileNotFoundError:
             logger.warning("No saved state found")
@@ -1,5 +1,7 @@
+from dataclasses import dataclass
+from functools import cached_property
 from pydantic import BaseModel
-from typing import Dict, List, Optional, Set
+from typing import Dict, List, Optional, Set, Tuple
 
 # User Preference Models
 class UserPreferences(BaseModel):
@@ -22,11 +24,29 @@ class DiagnosticInput(BaseModel):
     duration: Optional[str] = None
     additional_context: Optional[str] = None
 
+    @cached_property
+    def symptoms_sorted(self) -> Tuple[str, ...]:
+        """Canonical sorted view of the symptoms; computed once per input.
+
+        Access only after the perception layer has populated `symptoms`.
+        """
+        return tuple(sorted(self.symptoms))
+
 # Memory Layer Models
+@dataclass(slots=True)
+class EvidenceEntry:
+    """One structured piece of evidence recorded by the memory layer"""
+    timestamp: str
+    symptoms: List[str]
+    severity: int
+    duration: str
+    description: str
+    context: Optional[str]
+
 class DiagnosticState(BaseModel):
     """Current state of the diagnostic process"""
     active_hypotheses: Dict[str, float]  # disease -> probability
-    evidence_history: List[str]
+    evidence_history: List[EvidenceEntry]
     confidence_threshold: float
     session_start_time: str
 
@@ -1,4 +1,5 @@
 import logging
+import sys
 from models import DiagnosticInput, UserPreferences
 from typing import Optional, Dict, Set, List
 from rich.console import Console
@@ -8,9 +9,29 @@ console = Console()
 
 from formatting import print_layer_header, print_layer_output, print_separator
 
-from medical_knowledge import DISEASE_CATEGORIES
+from medical_knowledge import ALL_SYMPTOMS, DISEASE_CATEGORIES, match_symptoms
 import re
 
+try:
+    import ahocorasick  # C multi-pattern automaton, optional
+except ImportError:
+    ahocorasick = None
+
+# Compiled once; matching reported temperatures like "temp 101.3".
+# No IGNORECASE: _extract_symptoms only ever sees lowercased text
+_TEMP_RE = re.compile(r'(?:temperature|temp|fever)[^\d]*(\d+\.?\d*)')
+
+# Colloquial phrasings for symptoms whose variations go beyond
+# plural/prefix rules; fixed data, so built once at import
+_SPECIAL_CASES = {
+    "nausea": ["nauseous", "nauseated", "feeling sick", "queasy", "sick to stomach"],
+    "fever": ["high temperature", "elevated temperature", "temperature", "hot", "feverish", "running a fever"],
+    "headache": ["head pain", "head ache", "migraine", "pounding head", "throbbing headache"],
+    "cough": ["coughing", "persistent cough", "dry cough", "chest cough", "hacking"]
+}
+
+_VARIATION_PREFIXES = ('severe ', 'mild ', 'chronic ', 'acute ', 'feeling ')
+
 class PerceptionLayer:
     """
     Perception Layer - Processes raw input into structured diagnostic information.
@@ -21,10 +42,77 @@ class PerceptionLayer:
     
     def __init__(self, user_preferences: UserPreferences):
         self.preferences = user_preferences
-        self.known_symptoms = set()
-        for category in DISEASE_CATEGORIES.values():
-            self.known_symptoms.update(category["symptoms"])
-        logger.info(f"Initialized Perception Layer with preferences for user: {user_preferences.name}")
+        # The full vocabulary is already unioned into a frozenset at import
+        # by medical_knowledge; binding it makes new instances free
+        self.known_symptoms = ALL_SYMPTOMS
+        # Expand every symptom's variations once and fold them into a single
+        # compiled alternation plus a variation -> canonicals map, so each
+        # input is scanned in one regex pass instead of one substring search
+        # per symptom per call. A variation can imply several symptoms (for
+        # example "high temperature" is both a vocabulary symptom and a
+        # fever variation), so every canonical is kept, not just the first
+        # seen in iteration order
+        variation_to_symptoms: Dict[str, Set[str]] = {}
+        for symptom in self.known_symptoms:
+            for variation in self._get_symptom_variations(symptom):
+                variation_to_symptoms.setdefault(variation.lower(), set()).add(symptom)
+        self._variation_to_symptoms: Dict[str, frozenset] = {
+            variation: frozenset(canonicals)
+            for variation, canonicals in variation_to_symptoms.items()
+        }
+        self._symptom_re = re.compile(
+            r'\b(?:' + '|'.join(
+                re.escape(variation)
+                for variation in sorted(self._variation_to_symptoms, key=len, reverse=True)
+            ) + r')\b'
+        )
+        # Direct references to each category's symptom frozenset (frozen at
+        # import by medical_knowledge), skipping the nested dict lookups on
+        # every intersection
+        self._cat_symptoms = {
+            name: data["symptoms"] for name, data in DISEASE_CATEGORIES.items()
+        }
+        # Two-character prefixes of every variation; text containing none of
+        # them cannot match, so unrelated inputs skip the scan entirely
+        self._variation_prefixes = frozenset(
+            variation[:2] for variation in self._variation_to_symptoms
+        )
+        # Reverse index so history relevance checks look a condition's
+        # categories up directly instead of scanning every category
+        self._condition_to_categories: Dict[str, List[str]] = {}
+        for name, data in DISEASE_CATEGORIES.items():
+            for condition in data["conditions"]:
+                self._condition_to_categories.setdefault(condition, []).append(name)
+        # Preferences are fixed for the layer's lifetime, so resolve the
+        # user's concerns to their category symptom sets once here
+        self._concern_symptoms = {
+            concern: self._cat_symptoms[concern]
+            for concern in user_preferences.primary_health_concerns
+            if concern in self._cat_symptoms
+        }
+        # Likewise for medical history: union each known condition's
+        # category symptom sets, so relevance is one intersection per
+        # condition on the hot path
+        self._history_to_symptoms = {
+            condition: frozenset().union(
+                *(self._cat_symptoms[category]
+                  for category in self._condition_to_categories[condition])
+            )
+            for condition in user_preferences.medical_history
+            if condition in self._condition_to_categories
+        }
+        # With pyahocorasick installed, scan with its automaton instead of
+        # the regex: one pass reporting every variation hit
+        self._automaton = None
+        if ahocorasick is not None:
+            automaton = ahocorasick.Automaton()
+            for variation, canonicals in self._variation_to_symptoms.items():
+                # Length travels with the payload so hits can be checked
+                # for word boundaries, matching the regex path exactly
+                automaton.add_word(variation, (len(variation), canonicals))
+            automaton.make_automaton()
+            self._automaton = automaton
+        logger.info("Initialized Perception Layer with preferences for user: %s", user_preferences.name)
 
     def process_input(self, raw_description: str, diagnostic_input: DiagnosticInput) -> DiagnosticInput:
         """Process raw input into structured diagnostic input"""
@@ -32,8 +120,14 @@ class PerceptionLayer:
         print_layer_header("PERCEPTION LAYER")
         console.print("Extracting facts from input...")
         
-        # Extract symptoms from the description
-        detected_symptoms = self._extract_symptoms(raw_description.lower())
+        # Extract symptoms from the description. ASCII text (the common
+        # case) takes the fast lower() path; anything else gets the full
+        # casefold so non-ASCII descriptions still match consistently
+        if raw_description.isascii():
+            text = raw_description.lower()
+        else:
+            text = raw_description.casefold()
+        detected_symptoms = self._extract_symptoms(text)
         
         # Update diagnostic input with detected symptoms
         diagnostic_input.symptoms = detected_symptoms
@@ -45,25 +139,30 @@ class PerceptionLayer:
         if diagnostic_input.severity >= 7:
             high_severity_context = "High severity symptoms detected"
             if diagnostic_input.additional_context:
-                diagnostic_input.additional_context += f"\n{high_severity_context}"
+                diagnostic_input.additional_context = "\n".join(
+                    (diagnostic_input.additional_context, high_severity_context)
+                )
             else:
                 diagnostic_input.additional_context = high_severity_context
         
-        # Display structured output
-        output_dict = {
-            "Original Description": raw_description,
-            "Detected Symptoms": ", ".join(detected_symptoms) if detected_symptoms else "None detected",
-            "Severity": f"{diagnostic_input.severity}/10" if diagnostic_input.severity else "Not rated",
-            "Duration": diagnostic_input.duration or "Not specified"
-        }
-        
-        if diagnostic_input.additional_context:
-            output_dict["Context"] = diagnostic_input.additional_context
-        
-        print_layer_output({"Perception Output": output_dict})
+        # Display structured output; skip the formatting work entirely when
+        # nothing is rendering it (quiet console, filtered logging)
+        if console.is_terminal or logger.isEnabledFor(logging.INFO):
+            output_dict = {
+                "Original Description": raw_description,
+                "Detected Symptoms": ", ".join(detected_symptoms) if detected_symptoms else "None detected",
+                "Severity": f"{diagnostic_input.severity}/10" if diagnostic_input.severity else "Not rated",
+                "Duration": diagnostic_input.duration or "Not specified"
+            }
+
+            if diagnostic_input.additional_context:
+                output_dict["Context"] = diagnostic_input.additional_context
+
+            print_layer_output({"Perception Output": output_dict})
         
         # Log processing results
-        logger.info(f"Processed input with severity {diagnostic_input.severity}, detected {len(detected_symptoms)} symptoms")
+        logger.info("Processed input with severity %s, detected %d symptoms",
+                    diagnostic_input.severity, len(detected_symptoms))
         return diagnostic_input
         
     def _extract_symptoms(self, text: str) -> Set[str]:
@@ -71,78 +170,68 @@ class PerceptionLayer:
         detected = set()
         
         # Check for temperature values
-        temp_pattern = r'(?:temperature|temp|fever)[^\d]*(\d+\.?\d*)'
-        temp_match = re.search(temp_pattern, text, re.IGNORECASE)
+        temp_match = _TEMP_RE.search(text)
         if temp_match:
             try:
                 temp = float(temp_match.group(1))
+                # Intern so the synthesized symptoms are the same string
+                # objects used in the knowledge-base sets downstream
                 if temp > 98.6:  # Fahrenheit
-                    detected.add("fever")
-                    detected.add("high temperature")
+                    detected.add(sys.intern("fever"))
+                    detected.add(sys.intern("high temperature"))
                 elif temp > 37:  # Celsius
-                    detected.add("fever")
-                    detected.add("high temperature")
+                    detected.add(sys.intern("fever"))
+                    detected.add(sys.intern("high temperature"))
             except ValueError:
                 pass  # Invalid temperature format
         
-        # Check for known symptoms
-        for symptom in self.known_symptoms:
-            if symptom in text:
-                detected.add(symptom)
-            # Check for common variations
-            variations = self._get_symptom_variations(symptom)
-            if any(var in text for var in variations):
-                detected.add(symptom)
+        # Check for known symptoms in one scan over the text
+        detected.update(match_symptoms(text))
+
+        # One more pass for the variation vocabulary (plurals, modifiers,
+        # colloquial phrasings), mapped back to canonical symptoms; the
+        # prefix prefilter culls texts that cannot contain any variation
+        if not any(prefix in text for prefix in self._variation_prefixes):
+            return detected
+        if self._automaton is not None:
+            # The automaton reports raw substring hits; keep only those on
+            # word boundaries so results match the regex path
+            last = len(text) - 1
+            for end, (length, canonicals) in self._automaton.iter(text):
+                start = end - length + 1
+                if start and (text[start - 1].isalnum() or text[start - 1] == '_'):
+                    continue
+                if end < last and (text[end + 1].isalnum() or text[end + 1] == '_'):
+                    continue
+                detected.update(canonicals)
+        else:
+            for match in self._symptom_re.finditer(text):
+                detected.update(self._variation_to_symptoms[match.group(0)])
         return detected
     
     def _get_symptom_variations(self, symptom: str) -> List[str]:
-        """Generate common variations of symptom descriptions."""
+        """Generate common variations of symptom descriptions.
+
+        Only called while building the variation map in __init__; the hot
+        path looks matches up in that precomputed map.
+        """
         variations = [symptom]
-        
-        # Special case variations with severity indicators
-        special_cases = {
-            "nausea": ["nauseous", "nauseated", "feeling sick", "queasy", "sick to stomach"],
-            "fever": ["high temperature", "elevated temperature", "temperature", "hot", "feverish", "running a fever"],
-            "headache": ["head pain", "head ache", "migraine", "pounding head", "throbbing headache"],
-            "cough": ["coughing", "persistent cough", "dry cough", "chest cough", "hacking"]
-        }
-        
-        # Severity modifiers that strengthen symptom detection
-        severity_modifiers = {
-            "fever": ["high", "severe", "very", "extreme"],
-            "headache": ["severe", "bad", "terrible", "intense"],
-            "cough": ["bad", "severe", "constant", "persistent"],
-            "nausea": ["severe", "intense", "extreme", "constant"]
-        }
-        
-        if symptom in special_cases:
-            variations.extend(special_cases[symptom])
-        
+
+        if symptom in _SPECIAL_CASES:
+            variations.extend(_SPECIAL_CASES[symptom])
+
         # Handle plural/singular
         if symptom.endswith('s'):
             variations.append(symptom[:-1])
         else:
             variations.append(symptom + 's')
-            
+
         # Handle common prefixes
-        prefixes = ['severe ', 'mild ', 'chronic ', 'acute ', 'feeling ']
-        variations.extend(prefix + var for prefix in prefixes for var in variations[:])
-        
-        return variations
+        variations.extend(prefix + var for prefix in _VARIATION_PREFIXES for var in variations[:])
 
-        # Display structured output
-        print_layer_output({
-            "Perception Output": {
-                "Original Description": raw_description,
-                "Detected Symptoms": ", ".join(detected_symptoms) if detected_symptoms else "None detected",
-                "Severity": f"{severity}/10",
-                "Duration": duration,
-                "Context": context or "None provided"
-            }
-        })
-        
-        logger.info(f"Processed input with severity {severity}, detected {len(detected_symptoms)} symptoms")
-        return diagnostic_input
+        # Dedupe while keeping order; overlapping special cases and the
+        # plural rule can produce the same string twice
+        return list(dict.fromkeys(variations))
 
     def adapt_to_preferences(self, input_data: DiagnosticInput) -> DiagnosticInput:
         """Adjust input processing based on user preferences"""
@@ -151,11 +240,11 @@ class PerceptionLayer:
         contexts = []
         
         # Check for health concerns in symptoms
-        for concern in self.preferences.primary_health_concerns:
-            matching_symptoms = self._get_matching_symptoms_for_category(concern, input_data.symptoms)
+        for concern, concern_symptoms in self._concern_symptoms.items():
+            matching_symptoms = input_data.symptoms & concern_symptoms
             if matching_symptoms:
                 contexts.append(f"Symptoms match {concern.lower()} concerns: {', '.join(matching_symptoms)}")
-                logger.info(f"Input matches user's health concern: {concern}")
+                logger.info("Input matches user's health concern: %s", concern)
         
         # Add medical history context if relevant
         relevant_history = self._check_medical_history_relevance(input_data.symptoms)
@@ -166,32 +255,24 @@ class PerceptionLayer:
         if input_data.age > 60 and input_data.severity >= 7:
             contexts.append("Note: Age may increase risk factors")
         
-        # Combine all context information
+        # Combine all context information in one join; no repeated
+        # concatenation onto the accumulated context string
         if contexts:
-            context_str = "\n".join(contexts)
             if input_data.additional_context:
-                input_data.additional_context += f"\n{context_str}"
-            else:
-                input_data.additional_context = context_str
-                
+                contexts.insert(0, input_data.additional_context)
+            input_data.additional_context = "\n".join(contexts)
+
         return input_data
         
     def _get_matching_symptoms_for_category(self, category: str, symptoms: Set[str]) -> Set[str]:
         """Find symptoms that match a specific health category"""
-        if category in DISEASE_CATEGORIES:
-            category_symptoms = DISEASE_CATEGORIES[category]["symptoms"]
-            return symptoms.intersection(category_symptoms)
+        category_symptoms = self._cat_symptoms.get(category)
+        if category_symptoms is not None:
+            return symptoms & category_symptoms
         return set()
         
     def _check_medical_history_relevance(self, symptoms: Set[str]) -> List[str]:
         """Check if current symptoms relate to medical history"""
-        relevant_conditions = []
-        for condition in self.preferences.medical_history:
-            # Check if condition exists in any category's conditions
-            for category in DISEASE_CATEGORIES.values():
-                if condition in category["conditions"]:
-                    # If condition's category has overlapping symptoms
-                    if symptoms.intersection(category["symptoms"]):
-                        relevant_conditions.append(condition)
-                        break
-        return relevant_conditions
\ No newline at end of file
+        return [condition
+                for condition, related in self._history_to_symptoms.items()
+                if symptoms & related]
\ No newline at end of file